@@ -1,48 +1,145 @@
-from motor.motor_asyncio import AsyncIOMotorClient
+import asyncio
 from datetime import datetime
 import os
-from typing import Dict, List, Optional, Any
+import socket
+import time
+import uuid
+from typing import AsyncIterator, Dict, List, Optional, Any
 import logging
 
+from storage import StorageBackend, MongoBackend, SQLiteBackend
+from startup import startup_report
+from singleflight import SingleFlight, make_key
+
 logger = logging.getLogger(__name__)
 
+# Bump when a new data migration is added to DatabaseManager.migrate
+SCHEMA_VERSION = 1
+
+# A migration lock older than this is considered abandoned (seconds)
+MIGRATION_LOCK_TTL = float(os.environ.get('MIGRATION_LOCK_TTL', '300'))
+# Interval at which workers waiting on another worker's migration re-check (seconds)
+MIGRATION_WAIT_INTERVAL = 0.2
+
+# Documents fetched per round trip by stream_documents
+STREAM_BATCH_SIZE = int(os.environ.get('STREAM_BATCH_SIZE', '100'))
+
+def create_backend() -> StorageBackend:
+    """Build the storage backend selected by STORAGE_BACKEND ('mongo' or 'sqlite')"""
+    backend = os.environ.get('STORAGE_BACKEND', 'mongo').lower()
+    if backend == 'sqlite':
+        return SQLiteBackend(os.environ.get('SQLITE_PATH', 'portfolio.db'))
+    if backend == 'mongo':
+        mongo_url = os.environ.get('MONGO_URL')
+        if not mongo_url:
+            raise ValueError("MONGO_URL environment variable is not set")
+        return MongoBackend(
+            mongo_url,
+            os.environ.get('DB_NAME', 'portfolio'),
+            max_pool_size=int(os.environ.get('MONGO_MAX_POOL_SIZE', '100'))
+        )
+    raise ValueError(f"Unknown STORAGE_BACKEND: {backend}")
+
 class DatabaseManager:
-    def __init__(self):
-        self.client: Optional[AsyncIOMotorClient] = None
-        self.db = None
+    def __init__(self, backend: Optional[StorageBackend] = None):
+        self.backend: Optional[StorageBackend] = backend
+        # Coalesces identical concurrent reads into one backend query
+        self.single_flight = SingleFlight(
+            enabled=os.environ.get('SINGLE_FLIGHT_ENABLED', 'true').lower() == 'true'
+        )
+        # Per-collection write counter, part of the read keys so a read issued
+        # after a write never joins a query that started before it
+        self._generations: Dict[str, int] = {}
         
     async def connect(self):
-        """Connect to MongoDB"""
+        """Connect to the configured storage backend"""
         try:
-            mongo_url = os.environ.get('MONGO_URL')
-            if not mongo_url:
-                raise ValueError("MONGO_URL environment variable is not set")
+            if self.backend is None:
+                self.backend = create_backend()
             
-            self.client = AsyncIOMotorClient(mongo_url)
-            self.db = self.client[os.environ.get('DB_NAME', 'portfolio')]
+            async with startup_report.phase("storage_connect"):
+                await self.backend.connect()
             
-            # Test the connection
-            await self.client.admin.command('ping')
-            logger.info("Successfully connected to MongoDB")
+            # Test the connection and read the schema version concurrently
+            _, schema_version = await asyncio.gather(
+                startup_report.measure("storage_ping", self.backend.ping()),
+                startup_report.measure("schema_check", self.get_schema_version())
+            )
+            logger.info(f"Successfully connected to {self.backend.name} storage")
             
-            # Initialize data if collections are empty
-            await self.initialize_data()
+            # Seeding only runs once, when the stored schema version is behind
+            if schema_version < SCHEMA_VERSION:
+                async with startup_report.phase("migrate"):
+                    await self.run_migrations(schema_version)
             
         except Exception as e:
-            logger.error(f"Failed to connect to MongoDB: {e}")
+            logger.error(f"Failed to connect to storage: {e}")
             raise
     
     async def disconnect(self):
-        """Disconnect from MongoDB"""
-        if self.client:
-            self.client.close()
-            logger.info("Disconnected from MongoDB")
+        """Disconnect from the storage backend"""
+        if self.backend:
+            await self.backend.disconnect()
+            logger.info(f"Disconnected from {self.backend.name} storage")
+    
+    async def get_schema_version(self) -> int:
+        """Return the data version recorded by the last migration, 0 if never migrated"""
+        marker = await self.backend.find_one("migrations", {"id": "schema"})
+        return marker["version"] if marker else 0
+    
+    async def set_schema_version(self, version: int):
+        """Record the data version reached by the migrations"""
+        marker = {"version": version, "updated_at": datetime.utcnow()}
+        if not await self.backend.insert_if_absent("migrations", "schema", marker):
+            await self.backend.update_one("migrations", {"id": "schema"}, marker)
+    
+    async def run_migrations(self, schema_version: int):
+        """Migrate under a lock so only one worker seeds; the others wait for it to finish"""
+        owner = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        while schema_version < SCHEMA_VERSION:
+            # Epoch seconds, so the lock's age reads back the same on every backend
+            claimed = await self.backend.insert_if_absent(
+                "migrations", "lock", {"owner": owner, "claimed_at": time.time()}
+            )
+            if claimed:
+                try:
+                    # Another worker may have finished between our version read and the claim
+                    schema_version = await self.get_schema_version()
+                    if schema_version < SCHEMA_VERSION:
+                        await self.migrate(schema_version)
+                finally:
+                    await self.backend.delete_one("migrations", {"id": "lock", "owner": owner})
+                return
+            
+            await asyncio.sleep(MIGRATION_WAIT_INTERVAL)
+            await self._expire_migration_lock()
+            schema_version = await self.get_schema_version()
+    
+    async def _expire_migration_lock(self):
+        """Remove the migration lock if its owner appears to have died while holding it"""
+        lock = await self.backend.find_one("migrations", {"id": "lock"})
+        if lock and time.time() - lock["claimed_at"] > MIGRATION_LOCK_TTL:
+            logger.warning(f"Removing stale migration lock held by {lock['owner']}")
+            await self.backend.delete_one("migrations", {"id": "lock", "owner": lock["owner"]})
+    
+    async def migrate(self, current_version: int):
+        """Apply the data migrations newer than current_version"""
+        if current_version < 1:
+            await self.initialize_data()
+        await self.set_schema_version(SCHEMA_VERSION)
+        logger.info(f"Migrated data from version {current_version} to {SCHEMA_VERSION}")
     
     async def initialize_data(self):
         """Initialize the database with default data"""
         try:
+            photographer_count, categories_count, testimonials_count, services_count = await asyncio.gather(
+                self.count_documents("photographer"),
+                self.count_documents("categories"),
+                self.count_documents("testimonials"),
+                self.count_documents("services")
+            )
+            
             # Initialize photographer data
-            photographer_count = await self.db.photographer.count_documents({})
             if photographer_count == 0:
                 photographer_data = {
                     "id": "photographer-1",
@@ -55,11 +152,10 @@ class DatabaseManager:
                     "created_at": datetime.utcnow(),
                     "updated_at": datetime.utcnow()
                 }
-                await self.db.photographer.insert_one(photographer_data)
+                await self.backend.insert_one("photographer", photographer_data)
                 logger.info("Initialized photographer data")
             
             # Initialize categories
-            categories_count = await self.db.categories.count_documents({})
             if categories_count == 0:
                 categories_data = [
                     {
@@ -93,11 +189,10 @@ class DatabaseManager:
                         "updated_at": datetime.utcnow()
                     }
                 ]
-                await self.db.categories.insert_many(categories_data)
+                await self.backend.insert_many("categories", categories_data)
                 logger.info("Initialized categories data")
             
             # Initialize testimonials
-            testimonials_count = await self.db.testimonials.count_documents({})
             if testimonials_count == 0:
                 testimonials_data = [
                     {
@@ -121,11 +216,10 @@ class DatabaseManager:
                         "updated_at": datetime.utcnow()
                     }
                 ]
-                await self.db.testimonials.insert_many(testimonials_data)
+                await self.backend.insert_many("testimonials", testimonials_data)
                 logger.info("Initialized testimonials data")
             
             # Initialize services
-            services_count = await self.db.services.count_documents({})
             if services_count == 0:
                 services_data = [
                     {
@@ -162,29 +256,64 @@ class DatabaseManager:
                         "updated_at": datetime.utcnow()
                     }
                 ]
-                await self.db.services.insert_many(services_data)
+                await self.backend.insert_many("services", services_data)
                 logger.info("Initialized services data")
             
         except Exception as e:
             logger.error(f"Failed to initialize data: {e}")
             raise
     
+    def _written(self, collection: str):
+        self._generations[collection] = self._generations.get(collection, 0) + 1
+    
     # Generic CRUD operations
     async def create_document(self, collection: str, data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new document"""
-        data['created_at'] = datetime.utcnow()
-        data['updated_at'] = datetime.utcnow()
-        result = await self.db[collection].insert_one(data)
-        if result.inserted_id:
+        # Same timestamp for both, so a document never updated has created_at == updated_at
+        now = datetime.utcnow()
+        data['created_at'] = now
+        data['updated_at'] = now
+        inserted = await self.backend.insert_one(collection, data)
+        self._written(collection)
+        if inserted:
             return await self.get_document(collection, data['id'])
         return None
     
     async def get_document(self, collection: str, doc_id: str) -> Optional[Dict[str, Any]]:
         """Get a document by ID"""
-        document = await self.db[collection].find_one({"id": doc_id})
-        if document:
-            document['_id'] = str(document['_id'])
-        return document
+        key = make_key("get", collection, self._generations.get(collection, 0), doc_id)
+        document = await self.single_flight.do(key, lambda: self.backend.find_one(collection, {"id": doc_id}))
+        # Each caller gets its own copy of a shared result
+        return dict(document) if document else document
+    
+    async def get_keyed_document(self, collection: str, doc_id: str) -> Optional[Dict[str, Any]]:
+        """Get a keyed document (see StorageBackend.increment) by its primary key"""
+        key = make_key("key", collection, self._generations.get(collection, 0), doc_id)
+        document = await self.single_flight.do(key, lambda: self.backend.find_by_key(collection, doc_id))
+        return dict(document) if document else document
+    
+    async def increment_counter(self, collection: str, doc_id: str, field: str) -> int:
+        """Atomically increment a counter on a keyed document, creating it if needed"""
+        value = await self.backend.increment(collection, doc_id, field)
+        self._written(collection)
+        return value
+    
+    async def update_document_if_newer(
+        self, collection: str, doc_id: str, version_field: str, version: int, update_data: Dict[str, Any]
+    ) -> bool:
+        """Update a keyed document unless it already holds data from version or later"""
+        update_data['updated_at'] = datetime.utcnow()
+        updated = await self.backend.update_if_newer(collection, doc_id, version_field, version, update_data)
+        self._written(collection)
+        return updated
+    
+    async def expire_document_version(self, collection: str, doc_id: str, version_field: str, version: int) -> bool:
+        """Clear version_field on a keyed document unless it already holds data from version or later"""
+        expired = await self.backend.update_one(
+            collection, {"id": doc_id, version_field: {"$lt": version}}, {version_field: None}
+        )
+        self._written(collection)
+        return expired
     
     async def get_documents(
         self, 
@@ -196,40 +325,46 @@ class DatabaseManager:
     ) -> List[Dict[str, Any]]:
         """Get multiple documents with filters"""
         filter_dict = filter_dict or {}
-        cursor = self.db[collection].find(filter_dict)
-        
-        if sort:
-            cursor = cursor.sort(sort)
-        if skip:
-            cursor = cursor.skip(skip)
-        if limit:
-            cursor = cursor.limit(limit)
-        
-        documents = await cursor.to_list(length=None)
-        for doc in documents:
-            doc['_id'] = str(doc['_id'])
-        return documents
+        key = make_key("find", collection, self._generations.get(collection, 0), filter_dict, sort, limit, skip)
+        documents = await self.single_flight.do(
+            key,
+            lambda: self.backend.find(collection, filter_dict, sort=sort, limit=limit, skip=skip)
+        )
+        return [dict(doc) for doc in documents]
+    
+    async def stream_documents(
+        self,
+        collection: str,
+        filter_dict: Optional[Dict[str, Any]] = None,
+        sort: Optional[List[tuple]] = None,
+        batch_size: Optional[int] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yield documents one at a time, holding at most one batch in memory"""
+        filter_dict = filter_dict or {}
+        async for doc in self.backend.iter_documents(
+            collection, filter_dict, sort=sort, batch_size=batch_size or STREAM_BATCH_SIZE
+        ):
+            yield doc
     
     async def update_document(self, collection: str, doc_id: str, update_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Update a document"""
         update_data['updated_at'] = datetime.utcnow()
-        result = await self.db[collection].update_one(
-            {"id": doc_id}, 
-            {"$set": update_data}
-        )
-        if result.matched_count > 0:
+        matched = await self.backend.update_one(collection, {"id": doc_id}, update_data)
+        self._written(collection)
+        if matched:
             return await self.get_document(collection, doc_id)
         return None
     
     async def delete_document(self, collection: str, doc_id: str) -> bool:
         """Delete a document"""
-        result = await self.db[collection].delete_one({"id": doc_id})
-        return result.deleted_count > 0
+        deleted = await self.backend.delete_one(collection, {"id": doc_id})
+        self._written(collection)
+        return deleted
     
     async def count_documents(self, collection: str, filter_dict: Optional[Dict[str, Any]] = None) -> int:
         """Count documents in collection"""
         filter_dict = filter_dict or {}
-        return await self.db[collection].count_documents(filter_dict)
+        return await self.backend.count(collection, filter_dict)
 
 # Global database manager instance
 db_manager = DatabaseManager()
\ No newline at end of file
@@ -0,0 +1,249 @@
+import asyncio
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, Iterable, Optional, Set, Tuple
+import logging
+
+from database import db_manager
+
+logger = logging.getLogger(__name__)
+
+# Interval between polls of the contacts collection (seconds); local writes poll immediately
+POLL_INTERVAL = float(os.environ.get('CONTACT_STREAM_POLL_INTERVAL', '1.0'))
+# A change can commit after changes stamped later than it (a slow request, another
+# worker's clock lagging), so each poll also looks back this far (seconds)
+POLL_OVERLAP = 5.0
+# Contacts read per page; a poll keeps paging until it reads a short page
+POLL_LIMIT = 500
+# Maximum contacts replayed on reconnect; a larger gap sends a resync event instead
+REPLAY_LIMIT = 500
+# Per-subscriber queue size; a client that falls this far behind is disconnected
+SUBSCRIBER_QUEUE_SIZE = 100
+# Interval between keep-alive comments on idle streams (seconds)
+KEEPALIVE_INTERVAL = 15.0
+
+# (updated_at, id): orders contact changes and identifies a single change
+EventKey = Tuple[datetime, str]
+# (key, event name, contact)
+Event = Tuple[EventKey, str, Dict[str, Any]]
+
+
+def event_key(contact: Dict[str, Any]) -> EventKey:
+    return (contact["updated_at"], contact["id"])
+
+
+def format_event_id(key: EventKey) -> str:
+    return f"{key[0].isoformat()}|{key[1]}"
+
+
+def parse_event_id(event_id: str) -> Optional[EventKey]:
+    """Parse a Last-Event-ID header, None if it was not issued by this feed"""
+    timestamp, _, contact_id = event_id.partition("|")
+    try:
+        return (datetime.fromisoformat(timestamp), contact_id) if contact_id else None
+    except ValueError:
+        return None
+
+
+def _contact_event(contact: Dict[str, Any]) -> Event:
+    name = "contact.created" if contact["created_at"] == contact["updated_at"] else "contact.updated"
+    return (event_key(contact), name, contact)
+
+
+class EventBroker:
+    """In-process fan-out to Server-Sent Events subscribers with bounded queues"""
+
+    def __init__(self, queue_size: int = SUBSCRIBER_QUEUE_SIZE):
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._queue_size = queue_size
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def open(self) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self._queue_size)
+        self._subscribers.add(queue)
+        return queue
+
+    def close(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+
+    def publish(self, event: Event):
+        """Publish an event to every subscriber"""
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Slow consumer: drop it rather than buffering without bound.
+                # The client reconnects with Last-Event-ID and replays from the database.
+                logger.warning("Dropping slow SSE subscriber")
+                self._subscribers.discard(queue)
+                # Make room for the sentinel so the consumer notices it was dropped
+                queue.get_nowait()
+                queue.put_nowait(None)
+
+
+class ContactFeed:
+    """Change feed of the contacts collection for the admin inbox stream
+
+    Every worker tails the shared contacts collection on ``updated_at``, so a
+    subscriber sees changes made on any worker, and a reconnecting client
+    resumes from its Last-Event-ID by reading the collection.
+    """
+
+    def __init__(self, db=db_manager, broker: Optional[EventBroker] = None):
+        self.db = db
+        self.broker = broker or EventBroker()
+        # Key of the last change read; new changes are paged from there
+        self._cursor: Optional[EventKey] = None
+        self._seen: Set[EventKey] = set()
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def notify(self):
+        """Poll right away, after a contact was written by this worker"""
+        self._wake.set()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+            if not self.broker.subscriber_count:
+                # Nobody listening: restart from the current time once someone subscribes
+                self._cursor = None
+                continue
+            try:
+                await self.poll()
+            except Exception as e:
+                logger.error(f"Error polling contacts for the stream: {e}")
+
+    async def poll(self):
+        """Publish the contacts changed since the last poll"""
+        if self._cursor is None:
+            self._cursor = (datetime.utcnow(), "")
+            self._seen.clear()
+        since = self._cursor[0] - timedelta(seconds=POLL_OVERLAP)
+
+        # Late commits: changes stamped before the cursor that were not visible when it
+        # moved past them. Newest first, as late commits land right behind the cursor.
+        late = await self.db.get_documents(
+            "contacts",
+            filter_dict={"updated_at": {"$gt": since, "$lte": self._cursor[0]}},
+            sort=[("updated_at", -1), ("id", -1)],
+            limit=POLL_LIMIT
+        )
+        self._publish(reversed(late))
+
+        # New changes, a page at a time from the last key read (keyset pagination), so
+        # a burst larger than a page is read through instead of re-reading its first page
+        while True:
+            page = await self.db.get_documents(
+                "contacts",
+                filter_dict={"updated_at": {"$gte": self._cursor[0]}},
+                sort=[("updated_at", 1), ("id", 1)],
+                limit=POLL_LIMIT
+            )
+            self._publish(page)
+            if len(page) < POLL_LIMIT:
+                break
+            last = event_key(page[-1])
+            if last <= self._cursor:
+                # A full page sharing the cursor's timestamp: step past that instant
+                logger.warning(f"More than {POLL_LIMIT} contacts changed at {last[0].isoformat()}")
+                last = (last[0] + timedelta(microseconds=1), "")
+            self._cursor = last
+        if page:
+            self._cursor = max(self._cursor, event_key(page[-1]))
+
+        # Only changes inside the overlap window can be read again
+        since = self._cursor[0] - timedelta(seconds=POLL_OVERLAP)
+        self._seen = {key for key in self._seen if key[0] > since}
+
+    def _publish(self, contacts: Iterable[Dict[str, Any]]):
+        for contact in contacts:
+            key = event_key(contact)
+            if key in self._seen:
+                continue
+            self._seen.add(key)
+            self.broker.publish(_contact_event(contact))
+
+    async def _replay(self, cursor: EventKey):
+        """Return the changes after cursor, or None if there are too many to replay"""
+        contacts = await self.db.get_documents(
+            "contacts",
+            filter_dict={"updated_at": {"$gte": cursor[0]}},
+            sort=[("updated_at", 1), ("id", 1)],
+            limit=REPLAY_LIMIT + 1
+        )
+        missed = [contact for contact in contacts if event_key(contact) > cursor]
+        return None if len(contacts) > REPLAY_LIMIT else missed
+
+    async def subscribe(self, last_event_id: Optional[str] = None) -> AsyncIterator[Optional[Event]]:
+        """Yield contact events, replaying those after last_event_id first; yields None on idle keep-alive ticks"""
+        # Subscribe before replaying so no change falls between the two
+        queue = self.broker.open()
+        try:
+            replayed: Optional[EventKey] = None
+            if last_event_id:
+                cursor = parse_event_id(last_event_id)
+                missed = await self._replay(cursor) if cursor else None
+                if missed is None:
+                    # The gap cannot be replayed: ask the client to reload the list
+                    yield (None, "resync", {})
+                else:
+                    for contact in missed:
+                        yield _contact_event(contact)
+                    replayed = event_key(missed[-1]) if missed else cursor
+
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=KEEPALIVE_INTERVAL)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                if event is None:
+                    return
+                if replayed and event[0] <= replayed:
+                    # Already sent by the replay
+                    continue
+                yield event
+        finally:
+            self.broker.close(queue)
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def format_sse(event: Event) -> str:
+    """Format a single Server-Sent Event frame"""
+    key, name, data = event
+    payload = json.dumps(data, ensure_ascii=False, default=_json_default)
+    # Events without a key (resync) leave the client's Last-Event-ID unchanged
+    event_id = f"id: {format_event_id(key)}\n" if key else ""
+    return f"{event_id}event: {name}\ndata: {payload}\n\n"
+
+
+# Global contact change feed instance
+contact_feed = ContactFeed()
@@ -0,0 +1,147 @@
+import base64
+import binascii
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+from database import db_manager
+from singleflight import make_key
+
+logger = logging.getLogger(__name__)
+
+GALLERY_COLLECTION = "galleries"
+
+# Photo fields copied into the gallery document. The Base64 image stays in the
+# photo document and is referenced through image_url instead.
+PHOTO_SUMMARY_FIELDS = ("id", "title", "category", "date", "description", "is_visible", "order", "updated_at")
+
+# Bookkeeping fields of the stored gallery, not returned to clients
+INTERNAL_FIELDS = ("_id", "source_version", "built_version")
+
+# Leading bytes of the image formats accepted for upload
+IMAGE_SIGNATURES = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG", "image/png"),
+    (b"GIF8", "image/gif"),
+)
+
+
+def photo_image_url(photo: Dict[str, Any]) -> str:
+    """URL serving the photo's image; the version changes whenever the photo is updated"""
+    updated_at = photo.get("updated_at")
+    version = int(updated_at.timestamp() * 1000) if isinstance(updated_at, datetime) else 0
+    return f"/api/photos/{photo['id']}/image?v={version}"
+
+
+def decode_image(image: str) -> Tuple[bytes, str]:
+    """Decode a stored Base64 image (optionally a data: URL) into bytes and a media type"""
+    media_type = None
+    if image.startswith("data:"):
+        header, _, image = image.partition(",")
+        media_type = header[len("data:"):].split(";")[0] or None
+    try:
+        data = base64.b64decode(image, validate=True)
+    except (binascii.Error, ValueError):
+        raise ValueError("Photo image is not valid Base64")
+    if media_type is None:
+        media_type = "application/octet-stream"
+        if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+            media_type = "image/webp"
+        for signature, signature_type in IMAGE_SIGNATURES:
+            if data.startswith(signature):
+                media_type = signature_type
+    return data, media_type
+
+
+class GalleryManager:
+    """Maintains one precomputed gallery document per category
+
+    The gallery holds summaries of the visible photos of a category in display
+    order (images are served separately through image_url), so the category page
+    is served by a single lookup. Photo writes rebuild only the galleries of the
+    categories they touch.
+    """
+
+    def __init__(self, db=db_manager):
+        self.db = db
+
+    async def get_gallery(self, category_id: str) -> Dict[str, Any]:
+        """Return the gallery of a category, building it on first access or when marked stale"""
+        gallery = await self.db.get_keyed_document(GALLERY_COLLECTION, category_id)
+        if gallery is None or gallery.get("built_version") is None:
+            # Concurrent first visits share one build
+            gallery = await self.db.single_flight.do(
+                make_key("gallery", category_id), lambda: self._first_build(category_id)
+            )
+        return {key: value for key, value in gallery.items() if key not in INTERNAL_FIELDS}
+
+    async def _first_build(self, category_id: str) -> Dict[str, Any]:
+        if not await self.db.get_document("categories", category_id):
+            # Do not materialize galleries for unknown categories
+            return self._build(category_id, await self._visible_photos(category_id))
+        return await self.rebuild(category_id)
+
+    async def rebuild(self, category_id: str) -> Dict[str, Any]:
+        """Recompute and store the gallery of a category from its photos
+
+        Each rebuild takes a new source_version before reading the photos, and the
+        result is only stored if no rebuild with a later version got there first.
+        A rebuild that read the photos before a concurrent write (on any worker)
+        therefore never overwrites the gallery built after it. A failed rebuild
+        marks the gallery stale, so the next read rebuilds it.
+        """
+        version = await self.db.increment_counter(GALLERY_COLLECTION, category_id, "source_version")
+        try:
+            gallery = self._build(category_id, await self._visible_photos(category_id))
+            await self.db.update_document_if_newer(
+                GALLERY_COLLECTION, category_id, "built_version", version, dict(gallery)
+            )
+        except Exception:
+            await self._mark_stale(category_id, version)
+            raise
+        return await self.db.get_keyed_document(GALLERY_COLLECTION, category_id)
+
+    async def _mark_stale(self, category_id: str, version: int):
+        """Clear built_version unless a later rebuild already stored its result"""
+        try:
+            await self.db.expire_document_version(GALLERY_COLLECTION, category_id, "built_version", version)
+        except Exception as e:
+            logger.error(f"Failed to mark gallery {category_id} stale: {e}")
+
+    async def _visible_photos(self, category_id: str) -> List[Dict[str, Any]]:
+        return await self.db.get_documents(
+            "photos",
+            filter_dict={"category": category_id, "is_visible": True},
+            sort=[("order", 1), ("date", -1)]
+        )
+
+    async def photo_changed(self, before: Optional[Dict[str, Any]], after: Optional[Dict[str, Any]]):
+        """Refresh the galleries affected by a photo create (before=None), update or delete (after=None)"""
+        categories = {photo["category"] for photo in (before, after) if photo and photo.get("category")}
+        for category_id in categories:
+            try:
+                await self.rebuild(category_id)
+            except Exception as e:
+                # The photo write already succeeded; the gallery is rebuilt on its next read
+                logger.error(f"Failed to rebuild gallery for {category_id}: {e}")
+
+    @staticmethod
+    def _build(category_id: str, photos: List[Dict[str, Any]]) -> Dict[str, Any]:
+        summaries = [
+            {**{field: photo.get(field) for field in PHOTO_SUMMARY_FIELDS}, "image_url": photo_image_url(photo)}
+            for photo in photos
+        ]
+        updates = [photo["updated_at"] for photo in photos if isinstance(photo.get("updated_at"), datetime)]
+        return {
+            "id": category_id,
+            "category": category_id,
+            "photos": summaries,
+            "photo_count": len(summaries),
+            "cover_photo_id": summaries[0]["id"] if summaries else None,
+            "cover_image_url": summaries[0]["image_url"] if summaries else None,
+            "last_photo_update": max(updates) if updates else None
+        }
+
+
+# Global gallery manager instance
+gallery_manager = GalleryManager()
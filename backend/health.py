@@ -0,0 +1,151 @@
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+import logging
+
+from database import db_manager
+from startup import startup_report
+
+logger = logging.getLogger(__name__)
+
+# Readiness thresholds; an instance breaching any of them reports itself as not ready
+PING_TIMEOUT = float(os.environ.get('HEALTH_PING_TIMEOUT', '1.0'))
+PING_CACHE_TTL = float(os.environ.get('HEALTH_PING_CACHE_TTL', '2.0'))
+MAX_LOOP_LAG_MS = float(os.environ.get('HEALTH_MAX_LOOP_LAG_MS', '500'))
+MAX_P99_MS = float(os.environ.get('HEALTH_MAX_P99_MS', '2000'))
+MAX_POOL_USAGE = float(os.environ.get('HEALTH_MAX_POOL_USAGE', '0.9'))
+# The p99 only counts requests from the last LATENCY_WINDOW_SECONDS, and only
+# fails readiness once at least LATENCY_MIN_SAMPLES of them were recorded
+LATENCY_WINDOW_SECONDS = float(os.environ.get('HEALTH_LATENCY_WINDOW_SECONDS', '60'))
+LATENCY_MIN_SAMPLES = int(os.environ.get('HEALTH_LATENCY_MIN_SAMPLES', '50'))
+
+# Interval between event-loop lag samples (seconds)
+LOOP_LAG_INTERVAL = 0.5
+# Upper bound on the latencies kept in the window
+LATENCY_MAX_SAMPLES = 10000
+
+
+class HealthMonitor:
+    """Tracks the signals used by the liveness and readiness endpoints"""
+
+    def __init__(self, db=db_manager):
+        self.db = db
+        # (monotonic timestamp, latency in ms), oldest first
+        self._latencies: Deque[Tuple[float, float]] = deque(maxlen=LATENCY_MAX_SAMPLES)
+        self._loop_lags: Deque[float] = deque(maxlen=20)
+        self._lag_task: Optional[asyncio.Task] = None
+        self._ping_lock = asyncio.Lock()
+        self._ping_result: Optional[Tuple[float, Dict[str, Any]]] = None
+        self._started = time.monotonic()
+
+    def start(self):
+        """Start sampling event-loop lag"""
+        if self._lag_task is None:
+            self._lag_task = asyncio.create_task(self._sample_loop_lag())
+
+    async def stop(self):
+        if self._lag_task:
+            self._lag_task.cancel()
+            try:
+                await self._lag_task
+            except asyncio.CancelledError:
+                pass
+            self._lag_task = None
+
+    async def _sample_loop_lag(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + LOOP_LAG_INTERVAL
+            await asyncio.sleep(LOOP_LAG_INTERVAL)
+            self._loop_lags.append(max(0.0, loop.time() - expected) * 1000)
+
+    def record_latency(self, seconds: float):
+        self._latencies.append((time.monotonic(), seconds * 1000))
+
+    def _recent_latencies(self) -> List[float]:
+        """Drop samples older than the window and return the remaining latencies"""
+        cutoff = time.monotonic() - LATENCY_WINDOW_SECONDS
+        while self._latencies and self._latencies[0][0] < cutoff:
+            self._latencies.popleft()
+        return [latency for _, latency in self._latencies]
+
+    def latency_p99_ms(self) -> Optional[float]:
+        latencies = self._recent_latencies()
+        if not latencies:
+            return None
+        ordered = sorted(latencies)
+        return round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))], 2)
+
+    def loop_lag_ms(self) -> float:
+        return round(max(self._loop_lags), 2) if self._loop_lags else 0.0
+
+    async def check_database(self) -> Dict[str, Any]:
+        """Ping the storage backend, reusing a recent result so probes stay cheap"""
+        async with self._ping_lock:
+            now = time.monotonic()
+            if self._ping_result and now - self._ping_result[0] < PING_CACHE_TTL:
+                return self._ping_result[1]
+
+            started = time.perf_counter()
+            try:
+                await asyncio.wait_for(self.db.backend.ping(), timeout=PING_TIMEOUT)
+                result = {"ok": True, "latency_ms": round((time.perf_counter() - started) * 1000, 2)}
+            except asyncio.TimeoutError:
+                result = {"ok": False, "error": f"ping timed out after {PING_TIMEOUT}s"}
+            except Exception as e:
+                result = {"ok": False, "error": str(e)}
+
+            self._ping_result = (time.monotonic(), result)
+            return result
+
+    def liveness(self) -> Dict[str, Any]:
+        return {
+            "success": True,
+            "status": "alive",
+            "uptime_seconds": round(time.monotonic() - self._started, 1)
+        }
+
+    async def readiness(self) -> Dict[str, Any]:
+        """Build the readiness report; ``ready`` is False when any check fails"""
+        failures = []
+
+        if startup_report.ready_at is None or self.db.backend is None:
+            database = {"ok": False, "error": "startup not complete"}
+        else:
+            database = await self.check_database()
+        if not database["ok"]:
+            failures.append("database")
+
+        pool = self.db.backend.pool_stats() if self.db.backend else None
+        if pool and pool["max_size"] and pool["in_use"] / pool["max_size"] >= MAX_POOL_USAGE:
+            failures.append("pool")
+
+        loop_lag = self.loop_lag_ms()
+        if loop_lag > MAX_LOOP_LAG_MS:
+            failures.append("event_loop_lag")
+
+        p99 = self.latency_p99_ms()
+        samples = len(self._latencies)
+        # A drained instance stops receiving samples, so old ones age out and
+        # too few recent ones never count as degraded
+        if p99 is not None and samples >= LATENCY_MIN_SAMPLES and p99 > MAX_P99_MS:
+            failures.append("latency_p99")
+
+        return {
+            "success": not failures,
+            "status": "ready" if not failures else "degraded",
+            "failed_checks": failures,
+            "checks": {
+                "database": database,
+                "pool": pool,
+                "event_loop_lag_ms": loop_lag,
+                "latency_p99_ms": p99,
+                "latency_samples": samples
+            }
+        }
+
+
+# Global health monitor instance
+health_monitor = HealthMonitor()
@@ -1,15 +1,23 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Query, Body
+# Imported first so the startup report can time the remaining imports
+from startup import startup_report, PROCESS_STARTED
+from fastapi import FastAPI, APIRouter, HTTPException, Query, Body, Request, Header
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, JSONResponse, Response, RedirectResponse
 from contextlib import asynccontextmanager
 from datetime import datetime
 from typing import Optional, List, Dict, Any
 import logging
 import os
+import time
 from pathlib import Path
 
 # Import custom modules
 from models import *
 from database import db_manager
+from events import contact_feed, format_sse
+from health import health_monitor
+from galleries import gallery_manager, decode_image
+from streaming import stream_documents_response
 
 # Configure logging
 logging.basicConfig(
@@ -22,6 +30,7 @@ logger = logging.getLogger(__name__)
 ROOT_DIR = Path(__file__).parent
 from dotenv import load_dotenv
 load_dotenv(ROOT_DIR / '.env')
+startup_report.record("imports", PROCESS_STARTED)
 
 # Lifespan manager for startup and shutdown
 @asynccontextmanager
@@ -29,6 +38,9 @@ async def lifespan(app: FastAPI):
     # Startup
     try:
         await db_manager.connect()
+        health_monitor.start()
+        contact_feed.start()
+        startup_report.mark_ready()
         logger.info("Application started successfully")
     except Exception as e:
         logger.error(f"Failed to start application: {e}")
@@ -37,6 +49,8 @@ async def lifespan(app: FastAPI):
     yield
     
     # Shutdown
+    await health_monitor.stop()
+    await contact_feed.stop()
     await db_manager.disconnect()
     logger.info("Application shutdown")
 
@@ -60,6 +74,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Paths excluded from the latency window: probes and long-lived streams
+LATENCY_EXCLUDED_PATHS = {"/api/health/live", "/api/health/ready", "/api/contact/stream"}
+
+@app.middleware("http")
+async def record_latency(request: Request, call_next):
+    """Feed request latencies to the readiness p99"""
+    started = time.perf_counter()
+    response = await call_next(request)
+    if request.url.path not in LATENCY_EXCLUDED_PATHS:
+        health_monitor.record_latency(time.perf_counter() - started)
+    return response
+
 # ============ PHOTOGRAPHER ENDPOINTS ============
 
 @api_router.get("/photographer", response_model=Dict[str, Any])
@@ -204,23 +230,23 @@ async def get_photos(
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @api_router.get("/photos/category/{category_id}", response_model=Dict[str, Any])
-async def get_photos_by_category(category_id: str, visible_only: bool = Query(True)):
+async def get_photos_by_category(request: Request, category_id: str, visible_only: bool = Query(True)):
     """Get photos by category"""
     try:
-        filter_dict = {"category": category_id}
         if visible_only:
-            filter_dict["is_visible"] = True
+            # Served from the precomputed gallery document
+            gallery = await gallery_manager.get_gallery(category_id)
+            return {
+                "success": True,
+                "data": gallery["photos"]
+            }
         
-        photos = await db_manager.get_documents(
+        photos = db_manager.stream_documents(
             "photos",
-            filter_dict=filter_dict,
+            filter_dict={"category": category_id},
             sort=[("order", 1), ("date", -1)]
         )
-        
-        return {
-            "success": True,
-            "data": photos
-        }
+        return await stream_documents_response(request, photos)
     except Exception as e:
         logger.error(f"Error getting photos by category: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -233,6 +259,7 @@ async def create_photo(photo_data: PhotoCreate):
         photo_dict['id'] = f"photo-{int(datetime.utcnow().timestamp())}"
         
         created_photo = await db_manager.create_document("photos", photo_dict)
+        await gallery_manager.photo_changed(None, created_photo)
         return {
             "success": True,
             "message": "Photo created successfully",
@@ -242,22 +269,102 @@ async def create_photo(photo_data: PhotoCreate):
         logger.error(f"Error creating photo: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+@api_router.get("/photos/{photo_id}/image")
+async def get_photo_image(photo_id: str):
+    """Serve the image of a photo (referenced by image_url in gallery summaries)"""
+    try:
+        photo = await db_manager.get_document("photos", photo_id)
+        if not photo or not photo.get("image"):
+            raise HTTPException(status_code=404, detail="Photo not found")
+        
+        if photo["image"].startswith(("http://", "https://")):
+            return RedirectResponse(photo["image"])
+        
+        data, media_type = decode_image(photo["image"])
+        # image_url carries the photo version, so the response never changes for a given URL
+        return Response(
+            content=data,
+            media_type=media_type,
+            headers={"Cache-Control": "public, max-age=31536000, immutable"}
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting photo image: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@api_router.put("/photos/{photo_id}", response_model=Dict[str, Any])
+async def update_photo(photo_id: str, photo_data: PhotoUpdate):
+    """Update a photo"""
+    try:
+        photo = await db_manager.get_document("photos", photo_id)
+        if not photo:
+            raise HTTPException(status_code=404, detail="Photo not found")
+        
+        update_data = photo_data.dict(exclude_unset=True)
+        updated_photo = await db_manager.update_document("photos", photo_id, update_data)
+        if not updated_photo:
+            raise HTTPException(status_code=404, detail="Photo not found")
+        
+        await gallery_manager.photo_changed(photo, updated_photo)
+        return {
+            "success": True,
+            "message": "Photo updated successfully",
+            "data": updated_photo
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error updating photo: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@api_router.delete("/photos/{photo_id}", response_model=Dict[str, Any])
+async def delete_photo(photo_id: str):
+    """Delete a photo"""
+    try:
+        photo = await db_manager.get_document("photos", photo_id)
+        if not photo or not await db_manager.delete_document("photos", photo_id):
+            raise HTTPException(status_code=404, detail="Photo not found")
+        
+        await gallery_manager.photo_changed(photo, None)
+        return {
+            "success": True,
+            "message": "Photo deleted successfully"
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error deleting photo: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+# ============ GALLERIES ENDPOINTS ============
+
+@api_router.get("/galleries/{category_id}", response_model=Dict[str, Any])
+async def get_gallery(category_id: str):
+    """Get the precomputed gallery of a category (visible photos, cover and counts)"""
+    try:
+        gallery = await gallery_manager.get_gallery(category_id)
+        return {
+            "success": True,
+            "data": gallery
+        }
+    except Exception as e:
+        logger.error(f"Error getting gallery: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
 # ============ TESTIMONIALS ENDPOINTS ============
 
 @api_router.get("/testimonials", response_model=Dict[str, Any])
-async def get_testimonials(visible_only: bool = Query(True)):
+async def get_testimonials(request: Request, visible_only: bool = Query(True)):
     """Get all testimonials"""
     try:
         filter_dict = {"is_visible": True} if visible_only else {}
-        testimonials = await db_manager.get_documents(
+        testimonials = db_manager.stream_documents(
             "testimonials",
             filter_dict=filter_dict,
             sort=[("order", 1), ("created_at", -1)]
         )
-        return {
-            "success": True,
-            "data": testimonials
-        }
+        return await stream_documents_response(request, testimonials)
     except Exception as e:
         logger.error(f"Error getting testimonials: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -289,6 +396,7 @@ async def create_contact(contact_data: ContactCreate):
         contact_dict['id'] = f"contact-{int(datetime.utcnow().timestamp())}"
         
         created_contact = await db_manager.create_document("contacts", contact_dict)
+        contact_feed.notify()
         return {
             "success": True,
             "message": "Message envoyé avec succès. Nous vous répondrons dans les plus brefs délais.",
@@ -337,22 +445,79 @@ async def get_contacts(
         logger.error(f"Error getting contacts: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+@api_router.get("/contact/stream")
+async def stream_contacts(
+    request: Request,
+    status: Optional[str] = Query(None),
+    last_event_id: Optional[str] = Header(None)
+):
+    """Stream new and updated contact messages as Server-Sent Events (admin endpoint)
+
+    ``status`` filters new messages only; every update is sent.
+    """
+    async def event_generator():
+        # Tell EventSource how long to wait before reconnecting
+        yield "retry: 3000\n\n"
+        events = contact_feed.subscribe(last_event_id)
+        try:
+            async for event in events:
+                if await request.is_disconnected():
+                    break
+                if event is None:
+                    yield ": keep-alive\n\n"
+                    continue
+                _, name, data = event
+                # Only new messages are filtered by status: updates always pass, so a
+                # client filtering on a status sees messages leave it as well
+                if status and name == "contact.created" and data.get("status") != status:
+                    continue
+                yield format_sse(event)
+        finally:
+            await events.aclose()
+
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+@api_router.put("/contact/{contact_id}", response_model=Dict[str, Any])
+async def update_contact(contact_id: str, contact_data: ContactUpdate):
+    """Update a contact message status (admin endpoint)"""
+    try:
+        update_data = contact_data.dict(exclude_unset=True)
+        updated_contact = await db_manager.update_document("contacts", contact_id, update_data)
+        if not updated_contact:
+            raise HTTPException(status_code=404, detail="Contact not found")
+        
+        contact_feed.notify()
+        return {
+            "success": True,
+            "message": "Contact updated successfully",
+            "data": updated_contact
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error updating contact: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
 # ============ SERVICES ENDPOINTS ============
 
 @api_router.get("/services", response_model=Dict[str, Any])
-async def get_services(active_only: bool = Query(True)):
+async def get_services(request: Request, active_only: bool = Query(True)):
     """Get all services"""
     try:
         filter_dict = {"is_active": True} if active_only else {}
-        services = await db_manager.get_documents(
+        services = db_manager.stream_documents(
             "services",
             filter_dict=filter_dict,
             sort=[("order", 1), ("name", 1)]
         )
-        return {
-            "success": True,
-            "data": services
-        }
+        return await stream_documents_response(request, services)
     except Exception as e:
         logger.error(f"Error getting services: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -382,9 +547,23 @@ async def health_check():
     return {
         "success": True,
         "message": "Portfolio Photographique API is running",
-        "timestamp": datetime.utcnow()
+        "timestamp": datetime.utcnow(),
+        "startup": startup_report.as_dict(),
+        "single_flight": db_manager.single_flight.stats()
     }
 
+@api_router.get("/health/live")
+async def liveness_check():
+    """Liveness probe: the process is up and serving requests"""
+    return health_monitor.liveness()
+
+@api_router.get("/health/ready")
+async def readiness_check():
+    """Readiness probe: returns 503 when the instance should not receive traffic"""
+    report = await health_monitor.readiness()
+    report["timestamp"] = datetime.utcnow().isoformat()
+    return JSONResponse(status_code=200 if report["success"] else 503, content=report)
+
 # Include the router in the main app
 app.include_router(api_router)
 
@@ -0,0 +1,60 @@
+import asyncio
+import json
+from typing import Any, Awaitable, Callable, Dict
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def make_key(*parts: Any) -> str:
+    """Build a stable key from query parts (dict key order does not matter)"""
+    return json.dumps(parts, sort_keys=True, default=str)
+
+
+class SingleFlight:
+    """Merges concurrent identical calls into one shared execution
+
+    The first caller for a key starts the call; callers arriving while it is in
+    flight await the same result instead of issuing their own. Nothing is kept
+    once the call completes, so this is not a cache.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self.calls = 0
+        self.executions = 0
+        self.merged = 0
+
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        self.calls += 1
+        if not self.enabled:
+            self.executions += 1
+            return await func()
+
+        task = self._in_flight.get(key)
+        if task is None:
+            self.executions += 1
+            task = asyncio.ensure_future(func())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.merged += 1
+
+        # Shielded so a cancelled caller does not cancel the call shared with the others
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Future):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug(f"Shared call failed for {key}: {task.exception()}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "calls": self.calls,
+            "executions": self.executions,
+            "merged": self.merged,
+            "in_flight": len(self._in_flight)
+        }
@@ -0,0 +1,54 @@
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Dict, Any, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Process start reference, taken when the first backend module is imported
+PROCESS_STARTED = time.perf_counter()
+
+
+class StartupReport:
+    """Collects the duration of each startup phase"""
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+        self.ready_at: Optional[datetime] = None
+        self.total_ms: Optional[float] = None
+
+    def record(self, name: str, started: float):
+        """Record a phase that began at the given perf_counter value"""
+        self.phases[name] = round((time.perf_counter() - started) * 1000, 2)
+
+    @asynccontextmanager
+    async def phase(self, name: str):
+        """Time the enclosed block as a named phase"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, started)
+
+    async def measure(self, name: str, awaitable):
+        """Await and time a single awaitable, so concurrent phases are timed individually"""
+        async with self.phase(name):
+            return await awaitable
+
+    def mark_ready(self):
+        self.total_ms = round((time.perf_counter() - PROCESS_STARTED) * 1000, 2)
+        self.ready_at = datetime.utcnow()
+        breakdown = ", ".join(f"{name}={ms}ms" for name, ms in self.phases.items())
+        logger.info(f"Startup completed in {self.total_ms}ms ({breakdown})")
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "total_ms": self.total_ms,
+            "ready_at": self.ready_at,
+            "phases": dict(self.phases)
+        }
+
+
+# Global startup report instance
+startup_report = StartupReport()
@@ -0,0 +1,634 @@
+import asyncio
+import json
+import re
+import sqlite3
+import threading
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional, Any
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Collection and field names are interpolated into SQL, so they must be plain identifiers
+IDENTIFIER_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)*$")
+
+# Mongo-style comparison operators accepted in SQLite filters
+COMPARISON_OPERATORS = {"$gt": ">", "$gte": ">=", "$lt": "<", "$lte": "<="}
+
+# Datetimes are stored in the JSON column as {"$date": "<ISO string>"} (as in Mongo
+# extended JSON), so they read back as datetime whatever the field is called
+DATETIME_MARKER = "$date"
+
+
+class StorageBackend:
+    """Interface implemented by the storage engines behind DatabaseManager"""
+
+    name = "base"
+
+    async def connect(self):
+        raise NotImplementedError
+
+    async def disconnect(self):
+        raise NotImplementedError
+
+    async def ping(self):
+        raise NotImplementedError
+
+    def pool_stats(self) -> Optional[Dict[str, Optional[int]]]:
+        """Return connection pool usage ({in_use, waiting, max_size}) if the backend tracks it"""
+        return None
+
+    async def insert_one(self, collection: str, data: Dict[str, Any]) -> bool:
+        raise NotImplementedError
+
+    async def insert_many(self, collection: str, documents: List[Dict[str, Any]]):
+        raise NotImplementedError
+
+    async def insert_if_absent(self, collection: str, doc_id: str, data: Dict[str, Any]) -> bool:
+        """Atomically insert a document with the given id unless one exists; return whether it was inserted"""
+        raise NotImplementedError
+
+    async def find_one(self, collection: str, filter_dict: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    async def find(
+        self,
+        collection: str,
+        filter_dict: Dict[str, Any],
+        sort: Optional[List[tuple]] = None,
+        limit: Optional[int] = None,
+        skip: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def iter_documents(
+        self,
+        collection: str,
+        filter_dict: Dict[str, Any],
+        sort: Optional[List[tuple]] = None,
+        batch_size: int = 100
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yield matching documents, fetching at most batch_size of them at a time"""
+        raise NotImplementedError
+
+    async def update_one(self, collection: str, filter_dict: Dict[str, Any], update_data: Dict[str, Any]) -> bool:
+        """Apply a top-level field update to the first match; return whether a document matched"""
+        raise NotImplementedError
+
+    # Keyed documents: stored with the given id as their primary key (Mongo _id),
+    # so there is exactly one per id and lookups hit the primary index
+
+    async def find_by_key(self, collection: str, doc_id: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    async def increment(self, collection: str, doc_id: str, field: str) -> int:
+        """Atomically increment a counter field, creating the keyed document if needed; return the new value"""
+        raise NotImplementedError
+
+    async def update_if_newer(
+        self, collection: str, doc_id: str, version_field: str, version: int, update_data: Dict[str, Any]
+    ) -> bool:
+        """Set update_data and version_field=version unless the stored version is already >= version"""
+        raise NotImplementedError
+
+    async def delete_one(self, collection: str, filter_dict: Dict[str, Any]) -> bool:
+        raise NotImplementedError
+
+    async def count(self, collection: str, filter_dict: Dict[str, Any]) -> int:
+        raise NotImplementedError
+
+
+class PoolUsage:
+    """Per-server connection pool counters, updated from pymongo's monitoring threads"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._servers: Dict[Any, Dict[str, int]] = {}
+
+    def add(self, address, in_use: int = 0, waiting: int = 0):
+        with self._lock:
+            counts = self._servers.setdefault(address, {"in_use": 0, "waiting": 0})
+            counts["in_use"] += in_use
+            counts["waiting"] += waiting
+
+    def busiest(self) -> Dict[str, int]:
+        """Return the counts of the server with the highest usage"""
+        with self._lock:
+            if not self._servers:
+                return {"in_use": 0, "waiting": 0}
+            counts = max(self._servers.values(), key=lambda c: (c["in_use"], c["waiting"]))
+            return dict(counts)
+
+    def clear(self, address):
+        with self._lock:
+            self._servers.pop(address, None)
+
+
+def _pool_listener(usage: PoolUsage):
+    """Build a pymongo pool listener keeping checked-out/waiting counts in usage"""
+    from pymongo import monitoring
+
+    class PoolUsageListener(monitoring.ConnectionPoolListener):
+        def connection_check_out_started(self, event):
+            usage.add(event.address, waiting=1)
+
+        def connection_check_out_failed(self, event):
+            usage.add(event.address, waiting=-1)
+
+        def connection_checked_out(self, event):
+            usage.add(event.address, in_use=1, waiting=-1)
+
+        def connection_checked_in(self, event):
+            usage.add(event.address, in_use=-1)
+
+        def pool_created(self, event):
+            pass
+
+        def pool_ready(self, event):
+            pass
+
+        def pool_cleared(self, event):
+            pass
+
+        def pool_closed(self, event):
+            usage.clear(event.address)
+
+        def connection_created(self, event):
+            pass
+
+        def connection_ready(self, event):
+            pass
+
+        def connection_closed(self, event):
+            pass
+
+    return PoolUsageListener()
+
+
+class MongoBackend(StorageBackend):
+    """MongoDB storage through Motor"""
+
+    name = "mongo"
+
+    # Indexes created on connect (create_index is a no-op when they exist)
+    INDEXES = {
+        # The contact stream tails the collection on (updated_at, id) every second
+        "contacts": [[("updated_at", 1), ("id", 1)]],
+    }
+
+    def __init__(self, mongo_url: str, db_name: str, max_pool_size: int = 100):
+        self.mongo_url = mongo_url
+        self.db_name = db_name
+        self.max_pool_size = max_pool_size
+        self.client = None
+        self.db = None
+        self._pool = PoolUsage()
+
+    async def connect(self):
+        # Imported here so SQLite-only installs do not need the Mongo driver
+        from motor.motor_asyncio import AsyncIOMotorClient
+
+        # The client connects lazily, on the first index creation below
+        self.client = AsyncIOMotorClient(
+            self.mongo_url,
+            maxPoolSize=self.max_pool_size,
+            event_listeners=[_pool_listener(self._pool)]
+        )
+        self.db = self.client[self.db_name]
+        for collection, indexes in self.INDEXES.items():
+            for keys in indexes:
+                await self.db[collection].create_index(keys)
+
+    async def disconnect(self):
+        if self.client:
+            self.client.close()
+
+    async def ping(self):
+        await self.client.admin.command('ping')
+
+    def pool_stats(self) -> Optional[Dict[str, Optional[int]]]:
+        # maxPoolSize applies per server, so report the busiest server's pool
+        return {**self._pool.busiest(), "max_size": self.max_pool_size}
+
+    async def insert_one(self, collection: str, data: Dict[str, Any]) -> bool:
+        result = await self.db[collection].insert_one(data)
+        return result.inserted_id is not None
+
+    async def insert_many(self, collection: str, documents: List[Dict[str, Any]]):
+        await self.db[collection].insert_many(documents)
+
+    async def insert_if_absent(self, collection: str, doc_id: str, data: Dict[str, Any]) -> bool:
+        from pymongo.errors import DuplicateKeyError
+
+        # _id = doc_id makes concurrent upserts collide on the unique _id index
+        try:
+            result = await self.db[collection].update_one(
+                {"id": doc_id},
+                {"$setOnInsert": {**data, "_id": doc_id, "id": doc_id}},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            return False
+        return result.upserted_id is not None
+
+    async def find_one(self, collection: str, filter_dict: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        document = await self.db[collection].find_one(filter_dict)
+        if document:
+            document['_id'] = str(document['_id'])
+        return document
+
+    async def find(
+        self,
+        collection: str,
+        filter_dict: Dict[str, Any],
+        sort: Optional[List[tuple]] = None,
+        limit: Optional[int] = None,
+        skip: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        cursor = self.db[collection].find(filter_dict)
+
+        if sort:
+            cursor = cursor.sort(sort)
+        if skip:
+            cursor = cursor.skip(skip)
+        if limit:
+            cursor = cursor.limit(limit)
+
+        documents = await cursor.to_list(length=None)
+        for doc in documents:
+            doc['_id'] = str(doc['_id'])
+        return documents
+
+    async def iter_documents(
+        self,
+        collection: str,
+        filter_dict: Dict[str, Any],
+        sort: Optional[List[tuple]] = None,
+        batch_size: int = 100
+    ) -> AsyncIterator[Dict[str, Any]]:
+        cursor = self.db[collection].find(filter_dict).batch_size(batch_size)
+        if sort:
+            cursor = cursor.sort(sort)
+        try:
+            async for doc in cursor:
+                doc['_id'] = str(doc['_id'])
+                yield doc
+        finally:
+            await cursor.close()
+
+    async def update_one(self, collection: str, filter_dict: Dict[str, Any], update_data: Dict[str, Any]) -> bool:
+        result = await self.db[collection].update_one(filter_dict, {"$set": update_data})
+        return result.matched_count > 0
+
+    async def find_by_key(self, collection: str, doc_id: str) -> Optional[Dict[str, Any]]:
+        return await self.find_one(collection, {"_id": doc_id})
+
+    async def increment(self, collection: str, doc_id: str, field: str) -> int:
+        from pymongo import ReturnDocument
+
+        document = await self.db[collection].find_one_and_update(
+            {"_id": doc_id},
+            {"$inc": {field: 1}, "$setOnInsert": {"id": doc_id}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return document[field]
+
+    async def update_if_newer(
+        self, collection: str, doc_id: str, version_field: str, version: int, update_data: Dict[str, Any]
+    ) -> bool:
+        result = await self.db[collection].update_one(
+            {
+                "_id": doc_id,
+                # None matches a missing field and one cleared to mark the document stale
+                "$or": [{version_field: {"$lt": version}}, {version_field: None}]
+            },
+            {"$set": {**update_data, version_field: version}}
+        )
+        return result.matched_count > 0
+
+    async def delete_one(self, collection: str, filter_dict: Dict[str, Any]) -> bool:
+        result = await self.db[collection].delete_one(filter_dict)
+        return result.deleted_count > 0
+
+    async def count(self, collection: str, filter_dict: Dict[str, Any]) -> int:
+        return await self.db[collection].count_documents(filter_dict)
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {DATETIME_MARKER: value.isoformat()}
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _decode_document(pairs: List[tuple]) -> Any:
+    if len(pairs) == 1 and pairs[0][0] == DATETIME_MARKER and isinstance(pairs[0][1], str):
+        return datetime.fromisoformat(pairs[0][1])
+    return dict(pairs)
+
+
+class SQLiteBackend(StorageBackend):
+    """Embedded SQLite storage for single-node deployments and tests
+
+    Each collection is a table holding the document in a JSON column, with the
+    document ``id`` promoted to an indexed column and expression indexes on the
+    fields the API filters and sorts on.
+    """
+
+    name = "sqlite"
+
+    # Expression indexes matching the filters/sorts used by the API endpoints
+    INDEXES = {
+        "categories": [("is_active", "order", "name")],
+        "photos": [("category", "is_visible", "order", "date"), ("is_visible", "order", "date")],
+        "testimonials": [("is_visible", "order", "created_at")],
+        "services": [("is_active", "order", "name")],
+        "contacts": [("status", "created_at"), ("created_at",), ("updated_at", "id")],
+    }
+
+    def __init__(self, path: str):
+        self.path = path
+        self.conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._tables = set()
+        self._in_flight = 0
+
+    async def connect(self):
+        await asyncio.to_thread(self._open)
+
+    def _open(self):
+        # Autocommit mode; multi-statement writes open their own transaction
+        self.conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA busy_timeout=5000")
+
+    async def disconnect(self):
+        if self.conn:
+            await asyncio.to_thread(self.conn.close)
+            self.conn = None
+
+    async def ping(self):
+        await self._run(lambda: self.conn.execute("SELECT 1").fetchone())
+
+    def pool_stats(self) -> Optional[Dict[str, Optional[int]]]:
+        # A single shared connection: one operation runs, the others queue on the lock.
+        # There is no pool to exhaust, so no max_size is reported.
+        return {
+            "in_use": min(self._in_flight, 1),
+            "waiting": max(self._in_flight - 1, 0),
+            "max_size": None
+        }
+
+    async def _run(self, func):
+        """Run a blocking SQLite call in a worker thread, one at a time on the shared connection"""
+        def locked():
+            with self._lock:
+                return func()
+        self._in_flight += 1
+        try:
+            return await asyncio.to_thread(locked)
+        finally:
+            self._in_flight -= 1
+
+    @staticmethod
+    def _identifier(name: str) -> str:
+        if not IDENTIFIER_RE.match(name):
+            raise ValueError(f"Invalid identifier: {name!r}")
+        return name
+
+    def _field(self, field: str) -> str:
+        if field == "id":
+            return "id"
+        # A datetime compares and sorts as its ISO string, any other value as itself
+        path = f"$.{self._identifier(field)}"
+        return f"COALESCE(json_extract(data, '{path}.\"{DATETIME_MARKER}\"'), json_extract(data, '{path}'))"
+
+    def _table(self, collection: str) -> str:
+        """Return the quoted table name, creating the table and its indexes on first use"""
+        table = self._identifier(collection)
+        if table not in self._tables:
+            self.conn.execute(
+                f'CREATE TABLE IF NOT EXISTS "{table}" ('
+                '_id INTEGER PRIMARY KEY AUTOINCREMENT, '
+                'id TEXT, '
+                'data TEXT NOT NULL CHECK (json_valid(data)))'
+            )
+            self.conn.execute(f'CREATE INDEX IF NOT EXISTS "{table}__id" ON "{table}" (id)')
+            for fields in self.INDEXES.get(table, []):
+                columns = ", ".join(self._field(field) for field in fields)
+                self.conn.execute(
+                    f'CREATE INDEX IF NOT EXISTS "{table}__{"__".join(fields)}" ON "{table}" ({columns})'
+                )
+            self._tables.add(table)
+        return f'"{table}"'
+
+    @staticmethod
+    def _param(value: Any) -> Any:
+        return value.isoformat() if isinstance(value, datetime) else value
+
+    def _where(self, filter_dict: Dict[str, Any]):
+        clauses, params = [], []
+        for field, value in filter_dict.items():
+            if value is None:
+                clauses.append(f"{self._field(field)} IS NULL")
+            elif isinstance(value, dict):
+                # Range operators; datetimes compare correctly as ISO strings
+                for operator, operand in value.items():
+                    if operator not in COMPARISON_OPERATORS:
+                        raise ValueError(f"Unsupported filter operator {operator!r} on {field!r}")
+                    clauses.append(f"{self._field(field)} {COMPARISON_OPERATORS[operator]} ?")
+                    params.append(self._param(operand))
+            elif isinstance(value, list):
+                raise ValueError(f"Unsupported filter on {field!r}: arrays are not supported")
+            else:
+                clauses.append(f"{self._field(field)} = ?")
+                params.append(self._param(value))
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return where, params
+
+    def _order_by(self, sort: Optional[List[tuple]]) -> str:
+        if not sort:
+            return " ORDER BY _id"
+        terms = [f"{self._field(field)} {'DESC' if direction < 0 else 'ASC'}" for field, direction in sort]
+        return f" ORDER BY {', '.join(terms)}, _id"
+
+    @staticmethod
+    def _dumps(data: Dict[str, Any]) -> str:
+        return json.dumps({k: v for k, v in data.items() if k != '_id'}, default=_encode_value)
+
+    @staticmethod
+    def _loads(row) -> Dict[str, Any]:
+        document = json.loads(row[1], object_pairs_hook=_decode_document)
+        document['_id'] = str(row[0])
+        return document
+
+    async def insert_one(self, collection: str, data: Dict[str, Any]) -> bool:
+        def op():
+            cursor = self.conn.execute(
+                f"INSERT INTO {self._table(collection)} (id, data) VALUES (?, ?)",
+                (data.get('id'), self._dumps(data))
+            )
+            return cursor.lastrowid is not None
+        return await self._run(op)
+
+    async def insert_many(self, collection: str, documents: List[Dict[str, Any]]):
+        def op():
+            table = self._table(collection)
+            with self.conn:
+                self.conn.execute("BEGIN")
+                self.conn.executemany(
+                    f"INSERT INTO {table} (id, data) VALUES (?, ?)",
+                    [(doc.get('id'), self._dumps(doc)) for doc in documents]
+                )
+        await self._run(op)
+
+    async def insert_if_absent(self, collection: str, doc_id: str, data: Dict[str, Any]) -> bool:
+        def op():
+            table = self._table(collection)
+            with self.conn:
+                # IMMEDIATE takes the write lock, serializing this check with other processes
+                self.conn.execute("BEGIN IMMEDIATE")
+                if self.conn.execute(f"SELECT 1 FROM {table} WHERE id = ? LIMIT 1", (doc_id,)).fetchone():
+                    return False
+                self.conn.execute(
+                    f"INSERT INTO {table} (id, data) VALUES (?, ?)",
+                    (doc_id, self._dumps({**data, "id": doc_id}))
+                )
+                return True
+        return await self._run(op)
+
+    async def find_one(self, collection: str, filter_dict: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        def op():
+            where, params = self._where(filter_dict)
+            row = self.conn.execute(
+                f"SELECT _id, data FROM {self._table(collection)}{where} LIMIT 1", params
+            ).fetchone()
+            return self._loads(row) if row else None
+        return await self._run(op)
+
+    async def find(
+        self,
+        collection: str,
+        filter_dict: Dict[str, Any],
+        sort: Optional[List[tuple]] = None,
+        limit: Optional[int] = None,
+        skip: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        def op():
+            where, params = self._where(filter_dict)
+            query = f"SELECT _id, data FROM {self._table(collection)}{where}{self._order_by(sort)}"
+            if limit or skip:
+                query += " LIMIT ? OFFSET ?"
+                params.extend([limit or -1, skip or 0])
+            return [self._loads(row) for row in self.conn.execute(query, params)]
+        return await self._run(op)
+
+    async def iter_documents(
+        self,
+        collection: str,
+        filter_dict: Dict[str, Any],
+        sort: Optional[List[tuple]] = None,
+        batch_size: int = 100
+    ) -> AsyncIterator[Dict[str, Any]]:
+        if self.path == ":memory:":
+            # A second connection would open a different in-memory database
+            for doc in await self.find(collection, filter_dict, sort=sort):
+                yield doc
+            return
+
+        # Make sure the table exists before reading it from another connection
+        await self._run(lambda: self._table(collection))
+        where, params = self._where(filter_dict)
+        query = f"SELECT _id, data FROM {self._table(collection)}{where}{self._order_by(sort)}"
+
+        # A dedicated read connection (WAL allows concurrent readers) so the shared
+        # connection is not held while the client consumes the stream
+        def open_cursor():
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            return conn, conn.execute(query, params)
+
+        conn, cursor = await asyncio.to_thread(open_cursor)
+        try:
+            while True:
+                rows = await asyncio.to_thread(cursor.fetchmany, batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield self._loads(row)
+        finally:
+            await asyncio.to_thread(conn.close)
+
+    async def update_one(self, collection: str, filter_dict: Dict[str, Any], update_data: Dict[str, Any]) -> bool:
+        def op():
+            table = self._table(collection)
+            where, params = self._where(filter_dict)
+            with self.conn:
+                self.conn.execute("BEGIN IMMEDIATE")
+                row = self.conn.execute(f"SELECT _id, data FROM {table}{where} LIMIT 1", params).fetchone()
+                if not row:
+                    return False
+                document = self._loads(row)
+                document.update(update_data)
+                self.conn.execute(
+                    f"UPDATE {table} SET id = ?, data = ? WHERE _id = ?",
+                    (document.get('id'), self._dumps(document), row[0])
+                )
+                return True
+        return await self._run(op)
+
+    async def find_by_key(self, collection: str, doc_id: str) -> Optional[Dict[str, Any]]:
+        return await self.find_one(collection, {"id": doc_id})
+
+    async def increment(self, collection: str, doc_id: str, field: str) -> int:
+        def op():
+            table = self._table(collection)
+            with self.conn:
+                self.conn.execute("BEGIN IMMEDIATE")
+                row = self.conn.execute(f"SELECT _id, data FROM {table} WHERE id = ? LIMIT 1", (doc_id,)).fetchone()
+                if not row:
+                    self.conn.execute(
+                        f"INSERT INTO {table} (id, data) VALUES (?, ?)",
+                        (doc_id, self._dumps({"id": doc_id, field: 1}))
+                    )
+                    return 1
+                document = self._loads(row)
+                document[field] = document.get(field, 0) + 1
+                self.conn.execute(f"UPDATE {table} SET data = ? WHERE _id = ?", (self._dumps(document), row[0]))
+                return document[field]
+        return await self._run(op)
+
+    async def update_if_newer(
+        self, collection: str, doc_id: str, version_field: str, version: int, update_data: Dict[str, Any]
+    ) -> bool:
+        def op():
+            table = self._table(collection)
+            with self.conn:
+                self.conn.execute("BEGIN IMMEDIATE")
+                row = self.conn.execute(f"SELECT _id, data FROM {table} WHERE id = ? LIMIT 1", (doc_id,)).fetchone()
+                if not row:
+                    return False
+                document = self._loads(row)
+                if document.get(version_field) is not None and document[version_field] >= version:
+                    return False
+                document.update(update_data)
+                document[version_field] = version
+                self.conn.execute(f"UPDATE {table} SET data = ? WHERE _id = ?", (self._dumps(document), row[0]))
+                return True
+        return await self._run(op)
+
+    async def delete_one(self, collection: str, filter_dict: Dict[str, Any]) -> bool:
+        def op():
+            table = self._table(collection)
+            where, params = self._where(filter_dict)
+            cursor = self.conn.execute(
+                f"DELETE FROM {table} WHERE _id = (SELECT _id FROM {table}{where} LIMIT 1)", params
+            )
+            return cursor.rowcount > 0
+        return await self._run(op)
+
+    async def count(self, collection: str, filter_dict: Dict[str, Any]) -> int:
+        def op():
+            where, params = self._where(filter_dict)
+            return self.conn.execute(f"SELECT COUNT(*) FROM {self._table(collection)}{where}", params).fetchone()[0]
+        return await self._run(op)
@@ -0,0 +1,58 @@
+import json
+from typing import Any, AsyncIterator, Dict
+import logging
+
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+
+logger = logging.getLogger(__name__)
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def _dumps(document: Dict[str, Any]) -> bytes:
+    return json.dumps(jsonable_encoder(document), ensure_ascii=False).encode("utf-8")
+
+
+async def _encode_json(first: Dict[str, Any], documents: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[bytes]:
+    """Encode the usual {"success": true, "data": [...]} envelope one document at a time"""
+    yield b'{"success": true, "data": ['
+    try:
+        if first is not None:
+            yield _dumps(first)
+            async for document in documents:
+                yield b"," + _dumps(document)
+    except Exception as e:
+        # Headers are already sent: stop here, the truncated body tells the client it failed
+        logger.error(f"Error while streaming documents: {e}")
+        raise
+    yield b"]}"
+
+
+async def _encode_ndjson(first: Dict[str, Any], documents: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[bytes]:
+    """Encode one JSON document per line"""
+    try:
+        if first is not None:
+            yield _dumps(first) + b"\n"
+            async for document in documents:
+                yield _dumps(document) + b"\n"
+    except Exception as e:
+        logger.error(f"Error while streaming documents: {e}")
+        raise
+
+
+async def stream_documents_response(request: Request, documents: AsyncIterator[Dict[str, Any]]) -> StreamingResponse:
+    """Build a streaming list response, as NDJSON when the client accepts it
+
+    The first document is fetched before the response starts, so query errors
+    still surface as regular error responses.
+    """
+    first = None
+    async for document in documents:
+        first = document
+        break
+
+    if NDJSON_MEDIA_TYPE in request.headers.get("accept", ""):
+        return StreamingResponse(_encode_ndjson(first, documents), media_type=NDJSON_MEDIA_TYPE)
+    return StreamingResponse(_encode_json(first, documents), media_type="application/json")
@@ -37,6 +37,9 @@ apiClient.interceptors.response.use(
   }
 );
 
+// Image source for a photo: gallery summaries reference the image by URL
+export const photoImageSrc = (photo) => photo.image || `${BACKEND_URL}${photo.image_url}`;
+
 // Generic API hook
 export const useApi = (url, options = {}) => {
   const [data, setData] = useState(null);
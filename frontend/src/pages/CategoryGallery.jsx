@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { useParams, Link } from 'react-router-dom';
 import { ChevronLeft, Camera, Calendar, ArrowLeft, ArrowRight } from 'lucide-react';
-import { useCategories, usePhotosByCategory } from '../hooks/useApi';
+import { useCategories, usePhotosByCategory, photoImageSrc } from '../hooks/useApi';
 import LoadingSpinner from '../components/LoadingSpinner';
 import ErrorMessage from '../components/ErrorMessage';
 
@@ -131,7 +131,7 @@ const CategoryGallery = () => {
                   onClick={() => openLightbox(index)}
                 >
                   <img
-                    src={photo.image}
+                    src={photoImageSrc(photo)}
                     alt={photo.title}
                     className="w-full h-full object-cover group-hover:scale-110 transition-transform duration-500"
                     loading="lazy"
@@ -244,7 +244,7 @@ const CategoryGallery = () => {
 
             {/* Image */}
             <img
-              src={selectedPhoto.image}
+              src={photoImageSrc(selectedPhoto)}
               alt={selectedPhoto.title}
               className="max-w-full max-h-full rounded-lg shadow-2xl"
             />
@@ -0,0 +1,170 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+import events
+from database import DatabaseManager
+from events import ContactFeed, EventBroker, format_event_id, format_sse, parse_event_id
+from storage import SQLiteBackend
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def manager(path):
+    return DatabaseManager(SQLiteBackend(str(path)))
+
+
+async def take(stream, count):
+    """Collect the next count events from a subscription, skipping keep-alive ticks"""
+    received = []
+    async for event in stream:
+        if event is not None:
+            received.append(event)
+        if len(received) == count:
+            break
+    await stream.aclose()
+    return received
+
+
+def test_event_ids_round_trip():
+    key = (datetime(2024, 5, 1, 10, 30, 0, 123456), "contact-1")
+    assert parse_event_id(format_event_id(key)) == key
+    assert parse_event_id("not-an-id") is None
+    assert parse_event_id("garbage|contact-1") is None
+
+
+def test_format_sse():
+    key = (datetime(2024, 5, 1), "contact-1")
+    frame = format_sse((key, "contact.created", {"id": "contact-1", "created_at": datetime(2024, 5, 1)}))
+    lines = frame.split("\n")
+    assert lines[0] == "id: 2024-05-01T00:00:00|contact-1"
+    assert lines[1] == "event: contact.created"
+    assert json.loads(lines[2][len("data: "):]) == {"id": "contact-1", "created_at": "2024-05-01T00:00:00"}
+    assert frame.endswith("\n\n")
+    # Resync carries no id, so the client keeps its Last-Event-ID
+    assert format_sse((None, "resync", {})).startswith("event: resync\n")
+
+
+def test_broker_drops_slow_subscribers():
+    async def main():
+        broker = EventBroker(queue_size=2)
+        queue = broker.open()
+        for n in range(3):
+            broker.publish(((datetime(2024, 1, 1), str(n)), "contact.created", {}))
+        assert broker.subscriber_count == 0
+        items = [queue.get_nowait() for _ in range(queue.qsize())]
+        # The consumer ends on the sentinel after what it had buffered
+        assert items[-1] is None
+
+    run(main())
+
+
+@pytest.fixture
+def feed(tmp_path, monkeypatch):
+    monkeypatch.setattr(events, "POLL_INTERVAL", 0.02)
+    db = manager(tmp_path / "portfolio.db")
+    run(db.connect())
+    yield ContactFeed(db)
+    run(db.disconnect())
+
+
+def test_live_changes_from_another_worker(feed, tmp_path):
+    async def main():
+        other = manager(tmp_path / "portfolio.db")
+        await other.connect()
+        feed.start()
+        stream = feed.subscribe()
+        receiving = asyncio.ensure_future(stream.__anext__())
+        await asyncio.sleep(0.05)
+
+        await other.create_document("contacts", {"id": "c1", "status": "new"})
+        received = [await asyncio.wait_for(receiving, 2)]
+        # Polls only see the latest state, so update once the creation was delivered
+        await other.update_document("contacts", "c1", {"status": "read"})
+        received += await asyncio.wait_for(take(stream, 1), 2)
+        await feed.stop()
+        await other.disconnect()
+        return received
+
+    received = run(main())
+    assert [(name, data["status"]) for _, name, data in received] == [
+        ("contact.created", "new"),
+        ("contact.updated", "read"),
+    ]
+
+
+def test_replay_after_last_event_id(feed):
+    async def main():
+        first = await feed.db.create_document("contacts", {"id": "c1", "status": "new"})
+        await feed.db.create_document("contacts", {"id": "c2", "status": "new"})
+        await feed.db.update_document("contacts", "c1", {"status": "read"})
+        last_event_id = format_event_id((first["updated_at"], first["id"]))
+        return await take(feed.subscribe(last_event_id), 2)
+
+    received = run(main())
+    assert [(name, data["id"]) for _, name, data in received] == [
+        ("contact.created", "c2"),
+        ("contact.updated", "c1"),
+    ]
+
+
+def test_resync_for_unknown_ids_and_oversized_gaps(feed, monkeypatch):
+    async def main():
+        unknown = await take(feed.subscribe("issued-by-an-older-version"), 1)
+
+        monkeypatch.setattr(events, "REPLAY_LIMIT", 1)
+        for n in range(3):
+            await feed.db.create_document("contacts", {"id": f"c{n}", "status": "new"})
+        too_far = await take(feed.subscribe(format_event_id((datetime(2000, 1, 1), "c"))), 1)
+        return unknown, too_far
+
+    unknown, too_far = run(main())
+    assert unknown[0][1] == "resync"
+    assert too_far[0][1] == "resync"
+
+
+def drain(queue):
+    return [queue.get_nowait()[2]["id"] for _ in range(queue.qsize())]
+
+
+def test_poll_pages_through_bursts_larger_than_a_page(feed, monkeypatch):
+    monkeypatch.setattr(events, "POLL_LIMIT", 3)
+
+    async def main():
+        queue = feed.broker.open()
+        await feed.poll()
+        for n in range(5):
+            await feed.db.create_document("contacts", {"id": f"c{n}", "status": "new"})
+        await feed.poll()
+        burst = drain(queue)
+
+        await feed.db.create_document("contacts", {"id": "c5", "status": "new"})
+        await feed.poll()
+        await feed.poll()
+        return burst, drain(queue)
+
+    burst, later = run(main())
+    assert burst == ["c0", "c1", "c2", "c3", "c4"]
+    # The feed keeps moving after the burst and does not repeat it
+    assert later == ["c5"]
+
+
+def test_poll_picks_up_changes_committed_behind_the_cursor(feed):
+    async def main():
+        queue = feed.broker.open()
+        await feed.db.create_document("contacts", {"id": "c1", "status": "new"})
+        await feed.poll()
+        # Stamped before c1 but committed after the poll that read c1
+        stamped = feed._cursor[0] - timedelta(seconds=1)
+        await feed.db.backend.insert_one(
+            "contacts", {"id": "c0", "status": "new", "created_at": stamped, "updated_at": stamped}
+        )
+        await feed.poll()
+        await feed.poll()
+        return drain(queue)
+
+    assert run(main()) == ["c1", "c0"]
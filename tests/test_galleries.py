@@ -0,0 +1,127 @@
+import asyncio
+
+import pytest
+
+from database import DatabaseManager
+from galleries import GALLERY_COLLECTION, GalleryManager
+from storage import SQLiteBackend
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+@pytest.fixture
+def galleries(tmp_path):
+    db = DatabaseManager(SQLiteBackend(str(tmp_path / "portfolio.db")))
+    run(db.connect())
+    yield GalleryManager(db)
+    run(db.disconnect())
+
+
+async def add_photo(db, photo_id, order, category="nature", is_visible=True):
+    return await db.create_document("photos", {
+        "id": photo_id,
+        "title": photo_id,
+        "category": category,
+        "image": "aGVsbG8=",
+        "order": order,
+        "is_visible": is_visible,
+    })
+
+
+def photo_ids(gallery):
+    return [photo["id"] for photo in gallery["photos"]]
+
+
+def test_first_read_builds_and_stores_the_gallery(galleries):
+    async def main():
+        await add_photo(galleries.db, "p2", 2)
+        await add_photo(galleries.db, "p1", 1)
+        await add_photo(galleries.db, "hidden", 0, is_visible=False)
+        gallery = await galleries.get_gallery("nature")
+        stored = await galleries.db.get_keyed_document(GALLERY_COLLECTION, "nature")
+        return gallery, stored
+
+    gallery, stored = run(main())
+    assert photo_ids(gallery) == ["p1", "p2"]
+    assert gallery["cover_photo_id"] == "p1"
+    assert gallery["photos"][0]["image_url"].startswith("/api/photos/p1/image?v=")
+    assert "image" not in gallery["photos"][0]
+    # Bookkeeping fields stay on the stored document
+    assert not {"_id", "source_version", "built_version"} & set(gallery)
+    assert stored["built_version"] == stored["source_version"] == 1
+
+
+def test_unknown_categories_are_not_stored(galleries):
+    async def main():
+        gallery = await galleries.get_gallery("unknown")
+        return gallery, await galleries.db.count_documents(GALLERY_COLLECTION)
+
+    gallery, stored = run(main())
+    assert gallery["photos"] == []
+    assert stored == 0
+
+
+def test_a_rebuild_that_read_older_photos_does_not_overwrite_a_newer_one(galleries):
+    async def main():
+        await add_photo(galleries.db, "p1", 1)
+        read_photos = galleries._visible_photos
+        first_read = asyncio.Event()
+        resume_first = asyncio.Event()
+
+        async def slow_first_read(category_id):
+            photos = await read_photos(category_id)
+            if not first_read.is_set():
+                first_read.set()
+                await resume_first.wait()
+            return photos
+
+        galleries._visible_photos = slow_first_read
+        stale = asyncio.ensure_future(galleries.rebuild("nature"))
+        await first_read.wait()
+
+        # A photo is added and its rebuild completes while the first one is paused
+        await add_photo(galleries.db, "p2", 2)
+        await galleries.rebuild("nature")
+        resume_first.set()
+        await stale
+        return await galleries.get_gallery("nature")
+
+    assert photo_ids(run(main())) == ["p1", "p2"]
+
+
+def test_a_failed_rebuild_marks_the_gallery_stale(galleries):
+    async def main():
+        await add_photo(galleries.db, "p1", 1)
+        await galleries.get_gallery("nature")
+
+        added = await add_photo(galleries.db, "p2", 2)
+        read_photos = galleries._visible_photos
+
+        async def failing_read(category_id):
+            raise RuntimeError("database unavailable")
+
+        galleries._visible_photos = failing_read
+        await galleries.photo_changed(None, added)
+        stale = await galleries.db.get_keyed_document(GALLERY_COLLECTION, "nature")
+
+        galleries._visible_photos = read_photos
+        return stale, await galleries.get_gallery("nature")
+
+    stale, gallery = run(main())
+    assert stale["built_version"] is None
+    # The next read rebuilds instead of serving the gallery without p2
+    assert photo_ids(gallery) == ["p1", "p2"]
+
+
+def test_marking_stale_keeps_a_newer_build(galleries):
+    async def main():
+        await add_photo(galleries.db, "p1", 1)
+        await galleries.rebuild("nature")
+        await galleries.rebuild("nature")
+        # A rebuild that took version 1 fails after version 2 was stored
+        await galleries._mark_stale("nature", 1)
+        return await galleries.db.get_keyed_document(GALLERY_COLLECTION, "nature")
+
+    assert run(main())["built_version"] == 2
@@ -0,0 +1,107 @@
+import asyncio
+import json
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+import health
+from health import HealthMonitor
+from startup import startup_report
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class HangingBackend:
+    """A backend whose ping never answers"""
+
+    def __init__(self):
+        self.pings = 0
+
+    async def ping(self):
+        self.pings += 1
+        await asyncio.sleep(10)
+
+    def pool_stats(self):
+        return None
+
+
+class HealthyBackend(HangingBackend):
+    async def ping(self):
+        self.pings += 1
+
+
+@pytest.fixture(autouse=True)
+def started(monkeypatch):
+    monkeypatch.setattr(startup_report, "ready_at", datetime.utcnow())
+
+
+def monitor(backend):
+    return HealthMonitor(SimpleNamespace(backend=backend))
+
+
+def test_ping_timeout_fails_readiness_and_is_cached(monkeypatch):
+    monkeypatch.setattr(health, "PING_TIMEOUT", 0.02)
+    monkeypatch.setattr(health, "PING_CACHE_TTL", 0.2)
+    backend = HangingBackend()
+    checks = monitor(backend)
+
+    async def main():
+        first = await checks.readiness()
+        second = await checks.readiness()
+        pings_while_cached = backend.pings
+        await asyncio.sleep(0.25)
+        await checks.readiness()
+        return first, second, pings_while_cached
+
+    first, second, pings_while_cached = run(main())
+    assert first["success"] is False
+    assert first["failed_checks"] == ["database"]
+    assert "timed out" in first["checks"]["database"]["error"]
+    # Probes inside the cache TTL reuse the result instead of pinging again
+    assert second["checks"]["database"] == first["checks"]["database"]
+    assert pings_while_cached == 1
+    assert backend.pings == 2
+
+
+def test_readiness_endpoint_returns_503_when_degraded(monkeypatch):
+    server = pytest.importorskip("server")
+    monkeypatch.setattr(health, "PING_TIMEOUT", 0.02)
+    monkeypatch.setattr(server, "health_monitor", monitor(HangingBackend()))
+
+    response = run(server.readiness_check())
+    assert response.status_code == 503
+    assert json.loads(response.body)["status"] == "degraded"
+
+    monkeypatch.setattr(server, "health_monitor", monitor(HealthyBackend()))
+    assert run(server.readiness_check()).status_code == 200
+
+
+def test_high_p99_needs_enough_recent_samples(monkeypatch):
+    monkeypatch.setattr(health, "MAX_P99_MS", 1000)
+    monkeypatch.setattr(health, "LATENCY_MIN_SAMPLES", 20)
+    monkeypatch.setattr(health, "LATENCY_WINDOW_SECONDS", 0.1)
+    checks = monitor(HealthyBackend())
+
+    async def main():
+        for _ in range(19):
+            checks.record_latency(5.0)
+        too_few = await checks.readiness()
+
+        checks.record_latency(5.0)
+        enough = await checks.readiness()
+
+        # A drained instance records nothing new; its slow samples age out
+        await asyncio.sleep(0.15)
+        aged_out = await checks.readiness()
+        return too_few, enough, aged_out
+
+    too_few, enough, aged_out = run(main())
+    assert too_few["checks"]["latency_p99_ms"] == 5000
+    assert too_few["success"] is True
+    assert enough["failed_checks"] == ["latency_p99"]
+    assert aged_out["success"] is True
+    assert aged_out["checks"]["latency_samples"] == 0
+    assert aged_out["checks"]["latency_p99_ms"] is None
@@ -0,0 +1,89 @@
+import asyncio
+import time
+
+import pytest
+
+import database
+from database import SCHEMA_VERSION, DatabaseManager
+from storage import SQLiteBackend
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+@pytest.fixture(autouse=True)
+def fast_wait(monkeypatch):
+    monkeypatch.setattr(database, "MIGRATION_WAIT_INTERVAL", 0.01)
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "portfolio.db")
+
+
+def manager(path):
+    return DatabaseManager(SQLiteBackend(path))
+
+
+async def hold_lock(path, claimed_at):
+    """Claim the migration lock as another worker would"""
+    backend = SQLiteBackend(path)
+    await backend.connect()
+    await backend.insert_if_absent("migrations", "lock", {"owner": "other-worker", "claimed_at": claimed_at})
+    return backend
+
+
+def test_connect_seeds_once_and_releases_the_lock(path):
+    async def main():
+        db = manager(path)
+        await db.connect()
+        await db.connect()
+        counts = (
+            await db.count_documents("categories"),
+            await db.count_documents("services"),
+            await db.get_schema_version(),
+            await db.count_documents("migrations", {"id": "lock"}),
+        )
+        await db.disconnect()
+        return counts
+
+    assert run(main()) == (3, 3, SCHEMA_VERSION, 0)
+
+
+def test_waits_for_the_worker_holding_the_lock(path):
+    async def main():
+        other = await hold_lock(path, time.time())
+        db = manager(path)
+        connecting = asyncio.ensure_future(db.connect())
+        await asyncio.sleep(0.05)
+        # Still waiting on the other worker, which has not seeded anything yet
+        assert not connecting.done()
+
+        # The other worker finishes its migration and releases the lock
+        await other.insert_if_absent("migrations", "schema", {"version": SCHEMA_VERSION})
+        await other.delete_one("migrations", {"id": "lock"})
+        await asyncio.wait_for(connecting, 2)
+
+        categories = await db.count_documents("categories")
+        await db.disconnect()
+        await other.disconnect()
+        return categories
+
+    # The waiting worker saw the migration done and did not seed itself
+    assert run(main()) == 0
+
+
+def test_takes_over_an_abandoned_lock(path, monkeypatch):
+    monkeypatch.setattr(database, "MIGRATION_LOCK_TTL", 60)
+
+    async def main():
+        other = await hold_lock(path, time.time() - 120)
+        await other.disconnect()
+        db = manager(path)
+        await asyncio.wait_for(db.connect(), 2)
+        result = (await db.get_schema_version(), await db.count_documents("categories"))
+        await db.disconnect()
+        return result
+
+    assert run(main()) == (SCHEMA_VERSION, 3)
@@ -0,0 +1,131 @@
+import asyncio
+
+import pytest
+
+from database import DatabaseManager
+from singleflight import SingleFlight, make_key
+from storage import SQLiteBackend
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_make_key_ignores_dict_order():
+    assert make_key("find", "photos", {"a": 1, "b": 2}) == make_key("find", "photos", {"b": 2, "a": 1})
+    assert make_key("find", "photos", [("order", 1)]) != make_key("find", "photos", [("order", -1)])
+
+
+def test_concurrent_identical_calls_share_one_execution():
+    flight = SingleFlight()
+    executions = 0
+
+    async def query():
+        nonlocal executions
+        executions += 1
+        await asyncio.sleep(0.01)
+        return ["result"]
+
+    async def main():
+        return await asyncio.gather(*[flight.do("key", query) for _ in range(10)])
+
+    results = run(main())
+    assert results == [["result"]] * 10
+    assert executions == 1
+    assert flight.stats() == {"enabled": True, "calls": 10, "executions": 1, "merged": 9, "in_flight": 0}
+
+
+def test_different_keys_and_sequential_calls_are_not_merged():
+    flight = SingleFlight()
+
+    async def query():
+        await asyncio.sleep(0)
+        return 1
+
+    async def main():
+        await asyncio.gather(flight.do("a", query), flight.do("b", query))
+        await flight.do("a", query)
+
+    run(main())
+    assert flight.executions == 3
+    assert flight.merged == 0
+
+
+def test_errors_propagate_to_every_caller():
+    flight = SingleFlight()
+
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    async def main():
+        return await asyncio.gather(*[flight.do("key", failing) for _ in range(3)], return_exceptions=True)
+
+    results = run(main())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert flight.executions == 1
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_call():
+    flight = SingleFlight()
+
+    async def query():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    async def main():
+        first = asyncio.create_task(flight.do("key", query))
+        second = asyncio.create_task(flight.do("key", query))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert run(main()) == "done"
+
+
+def test_disabled_runs_every_call():
+    flight = SingleFlight(enabled=False)
+
+    async def query():
+        await asyncio.sleep(0)
+        return 1
+
+    async def main():
+        await asyncio.gather(*[flight.do("key", query) for _ in range(3)])
+
+    run(main())
+    assert flight.executions == 3
+    assert flight.merged == 0
+
+
+@pytest.fixture
+def db(tmp_path):
+    manager = DatabaseManager(SQLiteBackend(str(tmp_path / "portfolio.db")))
+    run(manager.connect())
+    yield manager
+    run(manager.disconnect())
+
+
+def test_manager_merges_reads_and_copies_results(db):
+    async def main():
+        return await asyncio.gather(*[
+            db.get_documents("categories", {"is_active": True}, sort=[("order", 1)]) for _ in range(5)
+        ])
+
+    results = run(main())
+    assert db.single_flight.merged >= 4
+    results[0][0]["name"] = "changed"
+    assert results[1][0]["name"] == "Mariage"
+
+
+def test_manager_reads_after_a_write_do_not_join_older_queries(db):
+    async def main():
+        before = asyncio.create_task(db.get_documents("services", {}))
+        await asyncio.sleep(0)
+        await db.create_document("services", {"id": "service-4", "name": "Portrait"})
+        after = await db.get_documents("services", {})
+        await before
+        return after
+
+    assert "service-4" in [doc["id"] for doc in run(main())]
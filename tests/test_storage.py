@@ -0,0 +1,186 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from storage import SQLiteBackend
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+@pytest.fixture
+def backend(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "portfolio.db"))
+    run(backend.connect())
+    yield backend
+    run(backend.disconnect())
+
+
+def photo(photo_id, order, date, category="nature", is_visible=True):
+    return {
+        "id": photo_id,
+        "title": photo_id,
+        "category": category,
+        "order": order,
+        "date": date,
+        "is_visible": is_visible,
+    }
+
+
+def seed(backend):
+    run(backend.insert_many("photos", [
+        photo("p1", 2, datetime(2024, 1, 1)),
+        photo("p2", 1, datetime(2024, 1, 2)),
+        photo("p3", 1, datetime(2024, 1, 3), is_visible=False),
+        photo("p4", 3, datetime(2024, 1, 4), category="mariage"),
+        photo("p5", 1, datetime(2024, 1, 5)),
+    ]))
+
+
+def ids(documents):
+    return [doc["id"] for doc in documents]
+
+
+def test_crud_round_trip(backend):
+    assert run(backend.insert_one("photos", photo("p1", 0, datetime(2024, 1, 1, 12, 30))))
+
+    document = run(backend.find_one("photos", {"id": "p1"}))
+    assert document["title"] == "p1"
+    assert document["date"] == datetime(2024, 1, 1, 12, 30)
+    assert document["is_visible"] is True
+    assert isinstance(document["_id"], str)
+
+    assert run(backend.count("photos", {})) == 1
+    assert run(backend.delete_one("photos", {"id": "p1"}))
+    assert not run(backend.delete_one("photos", {"id": "p1"}))
+    assert run(backend.find_one("photos", {"id": "p1"})) is None
+
+
+def test_find_on_missing_collection_is_empty(backend):
+    assert run(backend.find("services", {})) == []
+    assert run(backend.count("services", {})) == 0
+
+
+def test_sort_skip_and_limit(backend):
+    seed(backend)
+    sort = [("order", 1), ("date", -1)]
+
+    assert ids(run(backend.find("photos", {}, sort=sort))) == ["p5", "p3", "p2", "p1", "p4"]
+    assert ids(run(backend.find("photos", {}, sort=sort, limit=2))) == ["p5", "p3"]
+    assert ids(run(backend.find("photos", {}, sort=sort, skip=3))) == ["p1", "p4"]
+    assert ids(run(backend.find("photos", {}, sort=sort, skip=1, limit=2))) == ["p3", "p2"]
+
+
+def test_bool_and_datetime_filters(backend):
+    seed(backend)
+    sort = [("order", 1), ("date", -1)]
+
+    visible = run(backend.find("photos", {"category": "nature", "is_visible": True}, sort=sort))
+    assert ids(visible) == ["p5", "p2", "p1"]
+    assert ids(run(backend.find("photos", {"is_visible": False}))) == ["p3"]
+    assert ids(run(backend.find("photos", {"date": datetime(2024, 1, 2)}))) == ["p2"]
+    assert run(backend.count("photos", {"category": "nature", "is_visible": True})) == 3
+
+
+def test_range_filters(backend):
+    seed(backend)
+
+    after = run(backend.find("photos", {"date": {"$gt": datetime(2024, 1, 3)}}, sort=[("date", 1)]))
+    assert ids(after) == ["p4", "p5"]
+    between = run(backend.find(
+        "photos",
+        {"date": {"$gte": datetime(2024, 1, 2), "$lt": datetime(2024, 1, 4)}},
+        sort=[("date", 1)]
+    ))
+    assert ids(between) == ["p2", "p3"]
+
+    with pytest.raises(ValueError):
+        run(backend.find("photos", {"date": {"$in": []}}))
+
+
+def test_update_one_sets_top_level_fields(backend):
+    seed(backend)
+
+    assert run(backend.update_one("photos", {"id": "p1"}, {"title": "Renamed", "order": 0}))
+    document = run(backend.find_one("photos", {"id": "p1"}))
+    assert document["title"] == "Renamed"
+    assert document["order"] == 0
+    assert document["date"] == datetime(2024, 1, 1)
+
+    assert not run(backend.update_one("photos", {"id": "missing"}, {"title": "x"}))
+
+
+def test_invalid_identifiers_are_rejected(backend):
+    with pytest.raises(ValueError):
+        run(backend.find('photos"; DROP TABLE photos; --', {}))
+    with pytest.raises(ValueError):
+        run(backend.find("photos", {"title') = 1 OR (1": "x"}))
+
+
+def test_iter_documents_streams_in_order_across_batches(backend):
+    seed(backend)
+
+    async def collect():
+        return [doc async for doc in backend.iter_documents(
+            "photos", {"category": "nature"}, sort=[("order", 1), ("date", -1)], batch_size=2
+        )]
+
+    streamed = run(collect())
+    assert ids(streamed) == ["p5", "p3", "p2", "p1"]
+    assert streamed[0]["date"] == datetime(2024, 1, 5)
+
+
+def test_iter_documents_does_not_hold_the_shared_connection(backend):
+    seed(backend)
+
+    async def interleave():
+        documents = backend.iter_documents("photos", {}, sort=[("order", 1)], batch_size=1)
+        first = await documents.__anext__()
+        # The shared connection stays usable while the stream is open
+        await backend.update_one("photos", {"id": "p4"}, {"title": "during stream"})
+        rest = [doc async for doc in documents]
+        return [first] + rest
+
+    assert len(run(interleave())) == 5
+    assert run(backend.find_one("photos", {"id": "p4"}))["title"] == "during stream"
+
+
+def test_insert_if_absent(backend):
+    assert run(backend.insert_if_absent("migrations", "lock", {"owner": "a"}))
+    assert not run(backend.insert_if_absent("migrations", "lock", {"owner": "b"}))
+    assert run(backend.find_one("migrations", {"id": "lock"}))["owner"] == "a"
+
+
+def test_increment_and_update_if_newer(backend):
+    assert run(backend.increment("galleries", "nature", "source_version")) == 1
+    assert run(backend.increment("galleries", "nature", "source_version")) == 2
+    assert run(backend.count("galleries", {})) == 1
+
+    assert run(backend.update_if_newer("galleries", "nature", "built_version", 2, {"photos": ["new"]}))
+    # An older build must not overwrite a newer one
+    assert not run(backend.update_if_newer("galleries", "nature", "built_version", 1, {"photos": ["old"]}))
+    gallery = run(backend.find_by_key("galleries", "nature"))
+    assert gallery["photos"] == ["new"]
+    assert gallery["built_version"] == 2
+
+
+def test_datetimes_round_trip_under_any_field_name(backend):
+    claimed_at = datetime(2024, 3, 1, 8, 15, 30, 250000)
+    run(backend.insert_one("galleries", {
+        "id": "nature",
+        "last_photo_update": claimed_at,
+        "photos": [{"id": "p1", "updated_at": claimed_at}],
+        "note": "2024-03-01T08:15:30",
+    }))
+
+    gallery = run(backend.find_one("galleries", {"id": "nature"}))
+    assert gallery["last_photo_update"] == claimed_at
+    assert gallery["photos"][0]["updated_at"] == claimed_at
+    # A string that looks like a date stays a string
+    assert gallery["note"] == "2024-03-01T08:15:30"
+
+    assert run(backend.count("galleries", {"last_photo_update": claimed_at})) == 1
+    assert run(backend.count("galleries", {"last_photo_update": {"$gt": datetime(2024, 3, 1)}})) == 1
+    assert run(backend.count("galleries", {"last_photo_update": {"$gt": claimed_at}})) == 0
@@ -0,0 +1,131 @@
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+import database
+from database import db_manager
+from storage import SQLiteBackend
+from streaming import NDJSON_MEDIA_TYPE
+from server import app
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    # Serve the app from a seeded SQLite database, fetching two documents per batch
+    monkeypatch.setattr(db_manager, "backend", SQLiteBackend(str(tmp_path / "portfolio.db")))
+    monkeypatch.setattr(database, "STREAM_BATCH_SIZE", 2)
+    run(db_manager.connect())
+    yield db_manager
+    run(db_manager.disconnect())
+
+
+async def request(path, accept="application/json"):
+    """Issue a GET straight through the ASGI app; return (status, content type, body)"""
+    path, _, query = path.partition("?")
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [(b"host", b"testserver"), (b"accept", accept.encode())],
+        "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80),
+    }
+    received = False
+    disconnected = asyncio.Event()
+    messages = []
+
+    async def receive():
+        nonlocal received
+        if not received:
+            received = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # The client stays connected until the response is complete
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    start = messages[0]
+    headers = {key.decode(): value.decode() for key, value in start["headers"]}
+    body = b"".join(message.get("body", b"") for message in messages[1:])
+    return start["status"], headers["content-type"], body
+
+
+async def add_testimonials(count):
+    for n in range(count):
+        await db_manager.create_document("testimonials", {
+            "id": f"extra-{n}",
+            "name": f"Client {n}",
+            "text": "Merci !",
+            "is_visible": True,
+            "order": 10 + n,
+        })
+
+
+def test_empty_result_is_an_empty_envelope(db):
+    async def main():
+        for testimonial in await db.get_documents("testimonials"):
+            await db.delete_document("testimonials", testimonial["id"])
+        return await request("/api/testimonials")
+
+    status, content_type, body = run(main())
+    assert status == 200
+    assert content_type == "application/json"
+    assert json.loads(body) == {"success": True, "data": []}
+
+
+def test_json_envelope_across_batches(db):
+    async def main():
+        await add_testimonials(3)
+        return await request("/api/testimonials"), await db.get_documents(
+            "testimonials", {"is_visible": True}, sort=[("order", 1), ("created_at", -1)]
+        )
+
+    (status, _, body), expected = run(main())
+    assert status == 200
+    payload = json.loads(body)
+    assert payload["success"] is True
+    assert [doc["id"] for doc in payload["data"]] == [doc["id"] for doc in expected]
+    assert len(payload["data"]) == 5
+    # Datetimes are encoded as in the non-streamed responses
+    assert payload["data"][0]["created_at"] == expected[0]["created_at"].isoformat()
+
+
+def test_ndjson_when_accepted(db):
+    async def main():
+        await add_testimonials(1)
+        return await request("/api/testimonials?visible_only=false", accept=NDJSON_MEDIA_TYPE)
+
+    status, content_type, body = run(main())
+    assert status == 200
+    assert content_type == NDJSON_MEDIA_TYPE
+    lines = body.decode().splitlines()
+    assert [json.loads(line)["id"] for line in lines] == ["testimonial-1", "testimonial-2", "extra-0"]
+    assert body.endswith(b"\n")
+
+
+def test_error_on_the_first_document_is_a_500(db, monkeypatch):
+    async def failing_iter_documents(*args, **kwargs):
+        raise RuntimeError("query failed")
+        yield
+
+    monkeypatch.setattr(db.backend, "iter_documents", failing_iter_documents)
+    status, content_type, body = run(request("/api/services"))
+    assert status == 500
+    assert content_type == "application/json"
+    assert json.loads(body) == {"detail": "Internal server error"}